@@ -2,11 +2,12 @@
 
 import asyncio
 import random
-from typing import NoReturn
+from typing import Iterator, Optional
 
 import discord
 from discord import Embed, Interaction, InteractionType
 from discord.app_commands import AppCommandError, CommandNotFound
+from discord.ext import tasks
 from discord.ext.commands import (
     Bot,
     CheckFailure,
@@ -21,6 +22,10 @@ from src.envs import LOG_CHANNEL, LOG_GUILD
 
 ACTIV_TIME = 180
 
+# Discord allows 5 presence updates every 60 seconds
+PRESENCE_RATE = 5
+PRESENCE_PERIOD = 60
+
 
 module_list: tuple[str, ...] = (
     "general",
@@ -63,15 +68,18 @@ class CustomBot(Bot):
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self.activity_index: int = 0
-        self.activity_cycletime: int = ACTIV_TIME
-        self.activities: list[str] = status_list
+        self.activity_cycletime: int = max(ACTIV_TIME, PRESENCE_PERIOD // PRESENCE_RATE)
+        self.presence_limiter = utils.RateLimiter(PRESENCE_RATE, PRESENCE_PERIOD)
+        self.activities: tuple[str, ...] = tuple(status_list)
+        self.activity_queue: Iterator[str] = iter(())
+        self.log_channel: Optional[discord.TextChannel] = None
 
         self.tree.error(self.on_slash_error)
 
     async def on_ready(self) -> None:
-        if self.activities:
-            self.loop.create_task(self.cycle_activities())
+        if self.activities and not self.cycle_activities.is_running():
+            self.cycle_activities.change_interval(seconds=self.activity_cycletime)
+            self.cycle_activities.start()
 
         await self.init_cogs()
         await self.sync_cogs()
@@ -92,8 +100,8 @@ class CustomBot(Bot):
             ))
 
         if self.application and self.application.owner.id == inter.user.id and LOG_CHANNEL:
-            log_channel = await self.fetch_channel(int(LOG_CHANNEL))
-            if isinstance(log_channel, discord.TextChannel):
+            log_channel = await self.get_log_channel()
+            if log_channel:
                 embed = utils.err_embed(error, title=error.__class__.__name__)
                 await log_channel.send(self.application.owner.mention, embed=embed)
 
@@ -101,14 +109,26 @@ class CustomBot(Bot):
     async def on_command_error(self, context: Context, error: CommandError) -> None:
         pass
 
+    async def get_log_channel(self) -> Optional[discord.TextChannel]:
+        """Returns the log channel, hitting the API only on the first call."""
+        if self.log_channel is None:
+            channel_id = int(LOG_CHANNEL)
+            channel = self.get_channel(channel_id) or await self.fetch_channel(channel_id)
+            if isinstance(channel, discord.TextChannel):
+                self.log_channel = channel
+        return self.log_channel
+
     async def init_cogs(self) -> None:
         """Initializes all bot commands in the given modules."""
-        for module_name in module_list:
-            try:
-                await self.load_extension("src.cogs." + module_name)
+        await asyncio.gather(*(self.load_cog(module_name) for module_name in module_list))
+
+    async def load_cog(self, module_name: str) -> None:
+        """Loads a single cog module, reporting failures instead of raising."""
+        try:
+            await self.load_extension("src.cogs." + module_name)
 
-            except ExtensionError as err:
-                print(f"Cannot import cog '{module_name}' ({err}).")
+        except ExtensionError as err:
+            print(f"Cannot import cog '{module_name}' ({err}).")
 
     async def sync_cogs(self) -> None:
         """Syncs the slash commands to Discord."""
@@ -116,16 +136,16 @@ class CustomBot(Bot):
         if LOG_GUILD:
             await self.tree.sync(guild=discord.Object(int(LOG_GUILD)))
 
-    async def cycle_activities(self) -> NoReturn:
+    @tasks.loop(seconds=ACTIV_TIME)
+    async def cycle_activities(self) -> None:
         """Toggles between activities periodically."""
-        random.shuffle(self.activities)
-        while True:
-            activity = discord.Game(name=self.activities[self.activity_index])
-
-            await self.change_presence(activity=activity)
-            self.activity_index += 1
-            if self.activity_index % len(self.activities) == 0:
-                random.shuffle(self.activities)
-                self.activity_index = 0
-
-            await asyncio.sleep(self.activity_cycletime)
+        name = next(self.activity_queue, None)
+        if name is None:
+            self.activity_queue = iter(random.sample(self.activities, len(self.activities)))
+            name = next(self.activity_queue)
+        activity = discord.Game(name=name)
+
+        waited = await self.presence_limiter.acquire()
+        if waited:
+            print(f"Presence update held for {waited:.1f}s by the rate limit.")
+        await self.change_presence(activity=activity)
@@ -4,22 +4,23 @@ import re
 from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 
+from packaging.version import Version
+
 
 REQ_FILE_PATH = Path("requirements.txt")
+REQ_PATTERN = re.compile(r"([A-Za-z0-9_\-.]+)==(\S+)")
 
 
 def is_outdated(cur_version: str, min_version: str) -> bool:
     """Compares two versions and returns if `cur` is older than `min`."""
-    return [int(seg) for seg in cur_version.split(".")] < [int(seg) for seg in min_version.split(".")]
+    return Version(cur_version) < Version(min_version)
 
 
 def check_packages() -> None:
     """Checks if environment packages are older than requirements.txt ones."""
     with open(REQ_FILE_PATH, "r") as file:
-        lines: list[str] = file.readlines()
-
-        for line in lines:
-            match = re.search(r"(.*)==([0-9]+.[0-9]+.[0-9]+)", line)
+        for line in file:
+            match = REQ_PATTERN.match(line)
             if not match:
                 continue
 
@@ -2,8 +2,10 @@
 
 import textwrap
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import islice
 
+from cachetools import TTLCache
 from discord import Embed, Guild, TextStyle
 from discord.app_commands import (
     CheckFailure,
@@ -19,7 +21,7 @@ from discord.ui import Modal, TextInput
 import src.utils as utils
 from src.bot import CustomBot
 from src.config import BotConfig
-from src.db import call_database
+from src.db import call_database, close_connection
 
 
 cfg = BotConfig()
@@ -37,8 +39,11 @@ MAX_TEXT_LEN = 600
 
 TEXT_PLACEHOLDER = "De acordo com todas as conhecidas leis da aviação..."
 
+COMPLETE_CACHE_SIZE = 2048
+COMPLETE_CACHE_TTL = 60
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Bind:
     """Represents a Bind."""
 
@@ -47,101 +52,129 @@ class Bind:
     author: int
     guild: int
     time: int
+    display: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "display", self.name.capitalize())
 
 
 class BindManager:
     """Represents the Bind Manager system."""
 
+    SQL_CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS binds (
+            "name" TEXT,
+            "text" TEXT,
+            "author" INTEGER,
+            "guild" INTEGER,
+            "time" INTEGER,
+            UNIQUE("guild","name")
+        )
+    """
+    SQL_CREATE_INDEX = """
+        CREATE INDEX IF NOT EXISTS idx_binds_author_guild_name
+        ON binds (author, guild, name)
+    """
+    SQL_GET = """
+        SELECT *
+        FROM binds
+        WHERE name = ? AND guild = ?
+    """
+    SQL_GET_ALL = """
+        SELECT *
+        FROM binds
+        WHERE author = ? AND guild = ?
+    """
+    SQL_SEARCH = """
+        SELECT name
+        FROM binds
+        WHERE author = ? AND guild = ? AND name LIKE ? ESCAPE '\\'
+        ORDER BY name
+        LIMIT ?
+    """
+    SQL_ADD = """
+        INSERT INTO binds
+        VALUES (?, ?, ?, ?, ?)
+    """
+    SQL_EDIT = """
+        UPDATE binds
+        SET text = ?
+        WHERE name = ? AND guild = ?
+    """
+    SQL_DELETE = """
+        DELETE FROM binds
+        WHERE name = ? AND guild = ?
+    """
+    SQL_NUKE = """
+        DELETE FROM binds
+        WHERE guild = ?
+    """
+
     def __init__(self) -> None:
-        if BIND_ENABLED:
-            with call_database() as (conn, cursor):
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS binds (
-                        "name" TEXT,
-                        "text" TEXT,
-                        "author" INTEGER,
-                        "guild" INTEGER,
-                        "time" INTEGER,
-                        UNIQUE("guild","name")
-                    )
-                """)
-        self.complete_cache: dict[tuple[int, int], list[Bind]] = {}
-
-    def get_bind(self, name: str, guild: int) -> Bind | None:
+        self.complete_cache: TTLCache[tuple[int, int], list[Choice]] = TTLCache(
+            maxsize=COMPLETE_CACHE_SIZE,
+            ttl=COMPLETE_CACHE_TTL
+        )
+
+    async def create_table(self) -> None:
+        """Creates the binds table and its indexes if they do not exist."""
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_CREATE_TABLE)
+            await cursor.execute(self.SQL_CREATE_INDEX)
+
+    async def get_bind(self, name: str, guild: int) -> Bind | None:
         """Returns a Bind from the database."""
-        with call_database() as (conn, cursor):
-            cursor.execute("""
-                            SELECT *
-                            FROM binds
-                            WHERE name = ? AND guild = ?
-                           """,
-                           [name.lower(), guild])
-            bind = cursor.fetchone()
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_GET, [name.lower(), guild])
+            bind = await cursor.fetchone()
 
             if bind:
                 return Bind(*bind)
             return None
 
-    def get_all_binds(self, author: int, guild: int) -> list[Bind]:
+    async def get_all_binds(self, author: int, guild: int) -> list[Bind]:
         """Returns many Binds from the database."""
-        with call_database() as (conn, cursor):
-            cursor.execute("""
-                            SELECT *
-                            FROM binds
-                            WHERE author = ? AND guild = ?
-                           """,
-                           [author, guild])
-            binds = cursor.fetchall()
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_GET_ALL, [author, guild])
+            binds = await cursor.fetchall()
 
         if binds:
             return [Bind(*bind) for bind in binds]
         return []
 
-    def add_bind(self,
-                 name: str,
-                 text: str,
-                 author: int,
-                 guild: int,
-                 timestamp: float) -> None:
+    async def search_binds(self, author: int, guild: int, query: str, limit: int) -> list[str]:
+        """Returns the names of the Binds containing the query."""
+        query = query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_SEARCH, [author, guild, f"%{query}%", limit])
+            rows = await cursor.fetchall()
+
+        return [row[0] for row in rows]
+
+    async def add_bind(self,
+                       name: str,
+                       text: str,
+                       author: int,
+                       guild: int,
+                       timestamp: float) -> None:
         """Register a Bind into the database."""
-        with call_database() as (conn, cursor):
-            cursor.execute("""
-                            INSERT INTO binds
-                            VALUES (?, ?, ?, ?, ?)
-                           """,
-                           [name.lower(), text, author, guild, timestamp])
-            conn.commit()
-
-    def edit_bind(self, bind: Bind, new_text: str) -> None:
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_ADD, [name.lower(), text, author, guild, timestamp])
+
+    async def edit_bind(self, bind: Bind, new_text: str) -> None:
         """Edits a Bind from the database."""
-        with call_database() as (conn, cursor):
-            cursor.execute("""
-                            UPDATE binds
-                            SET text = ?
-                            WHERE name = ? AND guild = ?
-                           """,
-                           [new_text, bind.name, bind.guild])
-            conn.commit()
-
-    def delete_bind(self, bind: Bind) -> None:
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_EDIT, [new_text, bind.name, bind.guild])
+
+    async def delete_bind(self, bind: Bind) -> None:
         """Deletes a Bind from the database."""
-        with call_database() as (conn, cursor):
-            cursor.execute("""
-                            DELETE FROM binds
-                            WHERE name = ? AND guild = ?
-                           """,
-                           [bind.name, bind.guild])
-            conn.commit()
-
-    def nuke_server_binds(self, guild: int) -> None:
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_DELETE, [bind.name, bind.guild])
+
+    async def nuke_server_binds(self, guild: int) -> None:
         """Deletes all binds from a server."""
-        with call_database() as (conn, cursor):
-            cursor.execute("""
-                            DELETE FROM binds
-                            WHERE guild = ?
-                           """,
-                           [guild])
-            conn.commit()
+        async with call_database() as (conn, cursor):
+            await cursor.execute(self.SQL_NUKE, [guild])
 
 
 class BindRegisterModal(Modal):
@@ -167,7 +200,9 @@ class BindRegisterModal(Modal):
         text = self.textfield.value
         text = await cleanse_text(text, inter)
 
-        bind_manager.add_bind(self.name, text, inter.user.id, inter.guild.id, int(time.time()))
+        user_id, guild_id = inter.user.id, inter.guild.id
+        await bind_manager.add_bind(self.name, text, user_id, guild_id, int(time.time()))
+        bind_manager.complete_cache.pop((user_id, guild_id), None)
 
         embed = Embed(description=f"Você registrou uma bind com o nome de \"**{self.name.capitalize()}**\"!",
                       color=utils.COLOR_DEF)
@@ -196,8 +231,8 @@ class BindModifyModal(Modal):
         text = self.textfield.value
         text = await cleanse_text(text, inter)
 
-        bind_manager.edit_bind(self.bind, text)
-        embed = Embed(description=f"Você editou o texto da bind com o nome de \"**{self.bind.name.capitalize()}**\"!",
+        await bind_manager.edit_bind(self.bind, text)
+        embed = Embed(description=f"Você editou o texto da bind com o nome de \"**{self.bind.display}**\"!",
                       color=utils.COLOR_DEF)
         await inter.followup.send(embed=embed)
 
@@ -206,23 +241,25 @@ async def bind_complete(inter: Interaction, current: str) -> list[Choice]:
     """The autocomplete for the bind commands."""
     assert inter.user
     assert inter.guild
+    user_id, guild_id = inter.user.id, inter.guild.id
+
+    if current:
+        names = await bind_manager.search_binds(user_id, guild_id, current, utils.MAX_COMPLETE_OPTS)
+        return [Choice(name=name.capitalize(), value=name) for name in names]
 
     # Cache cuz calling the database each time is bad
-    user_tuple = (inter.user.id, inter.guild.id)
-    if not bind_manager.complete_cache.get(user_tuple):
-        bind_manager.complete_cache[user_tuple] = bind_manager.get_all_binds(inter.user.id, inter.guild.id)
-
-    if not current:
-        return [
-            Choice(name=bind.name.capitalize(), value=bind.name)
-            for bind in bind_manager.complete_cache[user_tuple][:utils.MAX_COMPLETE_OPTS]
+    user_tuple = (user_id, guild_id)
+    try:
+        return bind_manager.complete_cache[user_tuple]
+
+    except KeyError:
+        binds = await bind_manager.get_all_binds(user_id, guild_id)
+        choices = [
+            Choice(name=bind.display, value=bind.name)
+            for bind in binds[:utils.MAX_COMPLETE_OPTS]
         ]
-
-    return [
-        Choice(name=bind.name.capitalize(), value=bind.name)
-        for bind in bind_manager.complete_cache[user_tuple][:utils.MAX_COMPLETE_OPTS]
-        if current in bind.name
-    ]
+        bind_manager.complete_cache[user_tuple] = choices
+        return choices
 
 
 async def cleanse_text(text: str, inter: Interaction) -> str:
@@ -234,20 +271,15 @@ async def cleanse_text(text: str, inter: Interaction) -> str:
 
 def split_binds(binds: list[Bind], *, group_size: int = 15) -> list[list[Bind]]:
     """Splits a list of binds. Should be used to create pages."""
-    final_list: list[list[Bind]] = []
-    for _ in binds:
-        if not binds:
-            break
-        final_list.append(binds[:group_size])
-        binds = binds[group_size:]
-    return final_list
+    bind_iter = iter(binds)
+    return list(iter(lambda: list(islice(bind_iter, group_size)), []))
 
 
 def bind_groups_to_embeds(binds: list[list[Bind]]) -> list[Embed]:
     """Converts a splitted list of bind groups into a list of embeds."""
     final_binds: list[Embed] = []
     for group in binds:
-        bind_str = "\n".join(f"- {bind.name.capitalize()}" for bind in group)
+        bind_str = "\n".join(f"- {bind.display}" for bind in group)
 
         embed = (Embed(title="Suas binds:",
                        description=bind_str,
@@ -258,19 +290,24 @@ def bind_groups_to_embeds(binds: list[list[Bind]]) -> list[Embed]:
     return final_binds
 
 
-def existing_bind_emb(name: str) -> Embed:
-    return Embed(description=f"Uma bind nomeada \"**{name.capitalize()}**\" já existe.",
+NON_EXISTING_BIND_EMB = Embed(description="Não existe nenhuma bind registrada com esse nome.",
+                              color=utils.COLOR_ERR)
+
+NON_BIND_OWN_EMB = Embed(description="Você não é o autor dessa bind.",
+                         color=utils.COLOR_ERR)
+
+
+def existing_bind_emb(display: str) -> Embed:
+    return Embed(description=f"Uma bind nomeada \"**{display}**\" já existe.",
                  color=utils.COLOR_ERR)
 
 
 def non_existing_bind_emb() -> Embed:
-    return Embed(description=f"Não existe nenhuma bind registrada com esse nome.",
-                 color=utils.COLOR_ERR)
+    return NON_EXISTING_BIND_EMB.copy()
 
 
 def non_bind_own_emb() -> Embed:
-    return Embed(description="Você não é o autor dessa bind.",
-                 color=utils.COLOR_ERR)
+    return NON_BIND_OWN_EMB.copy()
 
 
 bind_manager = BindManager()
@@ -296,7 +333,7 @@ class BindGroup(Group):
 
     async def server_leave_deleter(self, guild: Guild) -> None:
         """Deletes all binds from a server when the bot leaves it."""
-        bind_manager.nuke_server_binds(guild.id)
+        await bind_manager.nuke_server_binds(guild.id)
 
     @command(
         name="say",
@@ -311,7 +348,7 @@ class BindGroup(Group):
         assert inter.guild
         await inter.response.defer()
 
-        bind = bind_manager.get_bind(name, inter.guild.id)
+        bind = await bind_manager.get_bind(name, inter.guild.id)
         if not bind:
             await inter.followup.send(embed=non_existing_bind_emb())
             return
@@ -329,9 +366,9 @@ class BindGroup(Group):
         """
         assert inter.guild
 
-        bind = bind_manager.get_bind(name, inter.guild.id)
+        bind = await bind_manager.get_bind(name, inter.guild.id)
         if bind:
-            await inter.response.send_message(embed=existing_bind_emb(bind.name), ephemeral=True)
+            await inter.response.send_message(embed=existing_bind_emb(bind.display), ephemeral=True)
             return
 
         if not name.isalnum():
@@ -359,7 +396,7 @@ class BindGroup(Group):
         assert inter.guild
         await inter.response.defer(ephemeral=True)
 
-        bind = bind_manager.get_bind(name, inter.guild.id)
+        bind = await bind_manager.get_bind(name, inter.guild.id)
         if not bind:
             await inter.followup.send(embed=non_existing_bind_emb())
             return
@@ -368,8 +405,9 @@ class BindGroup(Group):
             await inter.followup.send(embed=non_bind_own_emb())
             return
 
-        bind_manager.delete_bind(bind)
-        embed = Embed(description=f"Você deletou a bind com o nome de \"**{bind.name.capitalize()}**\"!",
+        await bind_manager.delete_bind(bind)
+        bind_manager.complete_cache.pop((bind.author, bind.guild), None)
+        embed = Embed(description=f"Você deletou a bind com o nome de \"**{bind.display}**\"!",
                       color=utils.COLOR_DEF)
         await inter.followup.send(embed=embed)
 
@@ -385,7 +423,7 @@ class BindGroup(Group):
         """
         assert inter.guild
 
-        bind = bind_manager.get_bind(name, inter.guild.id)
+        bind = await bind_manager.get_bind(name, inter.guild.id)
         if not bind:
             await inter.response.send_message(embed=non_existing_bind_emb(), ephemeral=True)
             return
@@ -410,7 +448,7 @@ class BindGroup(Group):
         assert inter.guild
         await inter.response.defer(ephemeral=True)
 
-        binds = bind_manager.get_all_binds(inter.user.id, inter.guild.id)
+        binds = await bind_manager.get_all_binds(inter.user.id, inter.guild.id)
         if not binds:
             embed = Embed(description="Você ainda não registrou nenhuma bind nesse servidor.",
                           color=utils.COLOR_ERR)
@@ -435,12 +473,12 @@ class BindGroup(Group):
         assert inter.guild
         await inter.response.defer(ephemeral=True)
 
-        bind = bind_manager.get_bind(name, inter.guild.id)
+        bind = await bind_manager.get_bind(name, inter.guild.id)
         if not bind:
             await inter.followup.send(embed=non_existing_bind_emb(), ephemeral=True)
             return
 
-        author = await self.bot.fetch_user(bind.author)
+        author = await utils.get_or_fetch_user(self.bot, bind.author)
         desc = textwrap.dedent(f"""\
             **Autor:** {author.mention} ({author.name})
             **Criada:** {utils.to_timestamp(bind.time, utils.Timestamp.Relative)}
@@ -451,10 +489,16 @@ class BindGroup(Group):
 
         embed = Embed(description=desc,
                       color=utils.COLOR_DEF,
-                      title=bind.name.capitalize())
+                      title=bind.display)
         embed.set_footer(text="Válida somente nesse servidor.")
         await inter.followup.send(embed=embed)
 
 
 async def setup(bot: CustomBot) -> None:
+    if BIND_ENABLED:
+        await bind_manager.create_table()
     bot.tree.add_command(BindGroup(bot))
+
+
+async def teardown(bot: CustomBot) -> None:
+    await close_connection()
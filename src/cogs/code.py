@@ -1,6 +1,12 @@
 """Code running commands."""
 
+import asyncio
+import json
+import os
+import time
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
 from textwrap import dedent
 from typing import Any
 
@@ -8,6 +14,7 @@ import discord
 import httpx
 from discord import ButtonStyle, Interaction, TextStyle
 from discord.app_commands import Choice, autocomplete, command
+from discord.ext import tasks
 from discord.ext.commands import Cog
 from discord.ui import Button, Label, Modal, TextInput, View, button
 from httpx import ReadTimeout
@@ -18,25 +25,86 @@ from src.bot import CustomBot
 
 MAX_OUTPUT_WIDTH = 600
 
+WANDBOX_URL = "https://wandbox.org"
+COMPILERS_CACHE = Path(".cache/wandbox_list.json")
+COMPILERS_TTL = 86400
 
-def get_compiler_list() -> list[dict[str, Any]]:
+compiler_list: list[dict[str, Any]] = []
+minimal_compiler_list: list[Choice] = []
+
+wandbox_client = httpx.AsyncClient(
+    base_url=WANDBOX_URL,
+    timeout=10,
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8)
+)
+
+# Lowercased compiler name -> compiler
+compiler_index: dict[str, dict[str, Any]] = {}
+
+# (lowercased language, compiler name, language) for every named compiler
+language_index: list[tuple[str, str, str]] = []
+
+
+async def fetch_compiler_list() -> list[dict[str, Any]]:
     """Gets the list of available compilers from WandBox API."""
+    request = await wandbox_client.get("/api/list.json")
+    response: list[dict[str, Any]] = request.raise_for_status().json()
+
+    # Head compilers don't work
+    functional_compilers = [
+        compiler for compiler in response
+        if "head" not in compiler.get("name", "").lower()
+    ]
+    return functional_compilers
+
+
+def is_cache_fresh() -> bool:
+    """Checks if the compiler list cache exists and has not expired."""
+    try:
+        return time.time() - COMPILERS_CACHE.stat().st_mtime < COMPILERS_TTL
+
+    except OSError:
+        return False
+
+
+def load_cached_compilers() -> list[dict[str, Any]]:
+    """Reads the compiler list from the disk cache, even if expired."""
     try:
-        request = httpx.get("https://wandbox.org/api/list.json", timeout=10)
-        response: list[dict[str, Any]] = request.json()
-
-        # Head compilers don't work
-        functional_compilers = [
-            compiler for compiler in response
-            if "head" not in compiler.get("name", "").lower()
-        ]
-        return functional_compilers
-
-    except Exception as err:
-        print(f"Cannot connect to WandBox. ({err})")
+        with open(COMPILERS_CACHE, "r") as file:
+            return json.load(file)
+
+    except (OSError, ValueError):
         return []
 
 
+def save_cached_compilers(compilers: list[dict[str, Any]]) -> None:
+    """Atomically rewrites the compiler list disk cache."""
+    COMPILERS_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = COMPILERS_CACHE.with_suffix(".tmp")
+    with open(temp_path, "w") as file:
+        json.dump(compilers, file)
+    os.replace(temp_path, COMPILERS_CACHE)
+
+
+def set_compiler_list(compilers: list[dict[str, Any]]) -> None:
+    """Replaces the compiler list and rebuilds its lookup tables."""
+    global compiler_list, minimal_compiler_list, compiler_index, language_index
+    compiler_list = compilers
+    minimal_compiler_list = get_minimal_list()
+
+    compiler_index = {
+        compiler["name"].lower(): compiler
+        for compiler in compiler_list
+        if compiler.get("name")
+    }
+    language_index = [
+        (language.lower(), compiler["name"], language)
+        for compiler in compiler_list
+        if compiler.get("name") and (language := compiler.get("language", "???"))
+    ]
+    search_compilers.cache_clear()
+
+
 def get_minimal_list() -> list[Choice]:
     """The list used in the empty autocomplete field."""
     min_choice_list: list[Choice] = []
@@ -60,26 +128,24 @@ async def compiler_complete(inter: Interaction, current: str) -> list[Choice]:
     if not current:
         return minimal_compiler_list
 
-    max_choice_list: list[Choice] = []
-    for item in compiler_list:
-        if len(max_choice_list) >= utils.MAX_COMPLETE_OPTS:
-            break
+    return search_compilers(current.lower())
 
-        compiler = item.get("name", "")
-        language = item.get("language", "???")
-        if current.lower() not in language.lower():
+
+@lru_cache(maxsize=256)
+def search_compilers(query: str) -> list[Choice]:
+    """Returns the compiler choices whose language contains the query."""
+    max_choice_list: list[Choice] = []
+    for language_lower, compiler, language in language_index:
+        if query not in language_lower:
             continue
 
-        if compiler and current.lower() in language.lower():
-            max_choice_list.append(Choice(name=f"{language} @ {compiler}", value=compiler))
+        max_choice_list.append(Choice(name=f"{language} @ {compiler}", value=compiler))
+        if len(max_choice_list) >= utils.MAX_COMPLETE_OPTS:
+            break
     return max_choice_list
 
 
-compiler_list = get_compiler_list()
-minimal_compiler_list = get_minimal_list()
-
-
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CodeLanguage:
     """Represents a code language supported by Wandbox."""
 
@@ -121,28 +187,26 @@ class CodeModal(Modal):
         code: str = self.code_field.component.value
         stdin: str = self.stdin_field.component.value
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    "https://wandbox.org/api/compile.json",
-                    timeout=10,
-                    json={
-                        "code": code,
-                        "compiler": self.lang_obj.compiler,
-                        "stdin": stdin
-                    })
-
-            except ReadTimeout:
-                await inter.followup.send(embed=utils.err_embed(
-                    "O servidor demorou muito tempo para responder."
-                ))
-                return
-
-            except Exception:
-                await inter.followup.send(embed=utils.err_embed(
-                    "Ocorreu um erro desconhecido ao processar a solicitação."
-                ))
-                return
+        try:
+            response = await wandbox_client.post(
+                "/api/compile.json",
+                json={
+                    "code": code,
+                    "compiler": self.lang_obj.compiler,
+                    "stdin": stdin
+                })
+
+        except ReadTimeout:
+            await inter.followup.send(embed=utils.err_embed(
+                "O servidor demorou muito tempo para responder."
+            ))
+            return
+
+        except Exception:
+            await inter.followup.send(embed=utils.err_embed(
+                "Ocorreu um erro desconhecido ao processar a solicitação."
+            ))
+            return
 
         if response.status_code == 500:
             await inter.followup.send(embed=utils.err_embed(
@@ -196,6 +260,38 @@ class RunCog(Cog):
     def __init__(self, bot: CustomBot) -> None:
         self.bot = bot
 
+    async def cog_load(self) -> None:
+        self.refresh_compilers.start()
+
+    async def cog_unload(self) -> None:
+        self.refresh_compilers.cancel()
+        await wandbox_client.aclose()
+
+    @tasks.loop(hours=1)
+    async def refresh_compilers(self) -> None:
+        """Refetches the compiler list whenever the disk cache expires."""
+        if is_cache_fresh():
+            if not compiler_list:
+                set_compiler_list(await asyncio.to_thread(load_cached_compilers))
+            return
+
+        try:
+            compilers = await fetch_compiler_list()
+
+        except Exception as err:
+            print(f"Cannot connect to WandBox. ({err})")
+            if not compiler_list:
+                set_compiler_list(await asyncio.to_thread(load_cached_compilers))
+            return
+
+        set_compiler_list(compilers)
+
+        try:
+            await asyncio.to_thread(save_cached_compilers, compilers)
+
+        except OSError as err:
+            print(f"Cannot write the compiler cache. ({err})")
+
     @command(
         name="code",
     )
@@ -207,18 +303,18 @@ class RunCog(Cog):
             language: A linguagem desejada. Digite para ver mais linguagens e compiladores.
         """
         requested_lang = language.split(" ")[-1].lower()
-        for compiler in compiler_list:
-            if requested_lang == compiler.get("name", "").lower():
-                compiler = CodeLanguage(
-                    compiler.get("language", "???"),
-                    compiler.get("version", "???"),
-                    requested_lang
-                )
-                modal = CodeModal(compiler)
-                await inter.response.send_modal(modal)
-                return
-
-        await inter.response.send_message(embed=utils.err_embed("Nenhum compilador foi encontrado."))
+        compiler = compiler_index.get(requested_lang)
+        if not compiler:
+            await inter.response.send_message(embed=utils.err_embed("Nenhum compilador foi encontrado."))
+            return
+
+        lang_obj = CodeLanguage(
+            compiler.get("language", "???"),
+            compiler.get("version", "???"),
+            requested_lang
+        )
+        modal = CodeModal(lang_obj)
+        await inter.response.send_modal(modal)
 
 
 async def setup(bot: CustomBot) -> None:
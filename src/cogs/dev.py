@@ -11,10 +11,59 @@ import src.utils as utils
 from src.bot import CustomBot
 
 
+OS_TEMPLATE = textwrap.dedent("""
+    Platform: {system}
+    Arch: {arch}
+""")
+
+PYTHON_TEMPLATE = textwrap.dedent("""
+    Version: {version}
+    Compiler: {compiler}
+    Discord.py: {discord}
+""")
+
+DISTRO_TEMPLATE = textwrap.dedent("""
+    Name: {name}
+    Edition: {edition}
+""")
+
+
+def get_sys_fields() -> list[tuple[str, str]]:
+    """Renders the system information fields shown by the info command."""
+    system = platform.system()
+
+    os_desc = OS_TEMPLATE.format(system=system or "???",
+                                 arch=platform.machine() or "???")
+    py_desc = PYTHON_TEMPLATE.format(version=platform.python_version() or "???",
+                                     compiler=platform.python_implementation() or "???",
+                                     discord=discord.__version__)
+    fields = [("OS", os_desc), ("PYTHON", py_desc)]
+
+    if system == "Linux":
+        try:
+            distro_info = platform.freedesktop_os_release()
+
+        except OSError:
+            distro_info = {}
+
+        distro_desc = DISTRO_TEMPLATE.format(name=distro_info.get("NAME", "???"),
+                                             edition=distro_info.get("VERSION_ID", "???"))
+        fields.append(("DISTRO", distro_desc))
+
+    return fields
+
+
+def format_perms(perms: discord.Permissions) -> str:
+    """Lists each permission with a colored marker for its state."""
+    return "\n".join(f"{'🟢' if value else '🔴'} {perm.capitalize()}"
+                     for perm, value in sorted(perms))
+
+
 class DevCog(Cog):
 
     def __init__(self, bot: CustomBot) -> None:
         self.bot = bot
+        self.sys_fields = get_sys_fields()
 
     def cog_check(self, ctx: Context) -> bool:
         if self.bot.application:
@@ -57,9 +106,7 @@ class DevCog(Cog):
         if not ctx.guild:
             return
 
-        perm_str = ""
-        for perm, value in sorted(ctx.guild.me.guild_permissions):
-            perm_str += f"{'🟢' if value else '🔴'} {perm.capitalize()}\n"
+        perm_str = format_perms(ctx.guild.me.guild_permissions)
 
         embed = discord.Embed(title="Permissões (Guilda)", description=perm_str, color=utils.COLOR_DEBUG)
         await ctx.send(embed=embed)
@@ -72,9 +119,7 @@ class DevCog(Cog):
         if not ctx.guild or not isinstance(ctx.me, discord.Member):
             return
 
-        perm_str = ""
-        for perm, value in sorted(ctx.channel.permissions_for(ctx.me)):
-            perm_str += f"{'🟢' if value else '🔴'} {perm.capitalize()}\n"
+        perm_str = format_perms(ctx.channel.permissions_for(ctx.me))
 
         embed = discord.Embed(title="Permissões (Canal)", description=perm_str, color=utils.COLOR_DEBUG)
         await ctx.send(embed=embed)
@@ -84,29 +129,9 @@ class DevCog(Cog):
     )
     async def info(self, ctx: Context) -> None:
         """Prints some system information."""
-        system = platform.system()
         embed = discord.Embed(color=utils.COLOR_DEBUG)
-
-        os_desc = textwrap.dedent(f"""
-            Platform: {system or "???"}
-            Arch: {platform.machine() or "???"}
-        """)
-        embed.add_field(name="OS", value=os_desc, inline=False)
-
-        py_desc = textwrap.dedent(f"""
-            Version: {platform.python_version() or "???"}
-            Compiler: {platform.python_implementation() or "???"}
-            Discord.py: {discord.__version__}
-        """)
-        embed.add_field(name="PYTHON", value=py_desc, inline=False)
-
-        if system == "Linux":
-            distro_info = platform.freedesktop_os_release()
-            distro_desc = textwrap.dedent(f"""
-                Name: {distro_info.get("NAME", "???")}
-                Edition: {distro_info.get("VERSION_ID", "???")}
-            """)
-            embed.add_field(name="DISTRO", value=distro_desc, inline=False)
+        for name, value in self.sys_fields:
+            embed.add_field(name=name, value=value, inline=False)
 
         await ctx.send(embed=embed)
 
@@ -1,6 +1,6 @@
 """Uncategorized commands."""
 
-from random import randint, sample, shuffle
+from random import SystemRandom, getrandbits
 from textwrap import dedent
 from time import time
 
@@ -14,15 +14,31 @@ from src.bot import CustomBot
 
 DICE_LIMIT = 50_000
 
+RAFFLE_TEMPLATE = dedent("""
+    Entradas: **{entries}**
+    Sorteados: **{winners}**
+""")
 
-def clean_entries(names: list[str]) -> list[str]:
-    """Strips each raffle entry and removes empty ones."""
-    final_names: list[str] = []
-    for name in names:
-        name = name.strip()
-        if name:
-            final_names.append(name)
-    return final_names
+PING_TEMPLATE = dedent("""
+    Latência Direta: **{direct}ms**
+    Latência Adiada: **{deferred}ms**
+""")
+
+RAFFLE_RANDOM = SystemRandom()
+
+
+def roll_dice(sides: int, amount: int) -> int:
+    """Sums the rolls of `amount` dice with `sides` sides each."""
+    # Rejection sampling, like randrange
+    bits = (sides - 1).bit_length()
+    total: int = amount
+    rolled: int = 0
+    while rolled < amount:
+        value = getrandbits(bits)
+        if value < sides:
+            total += value
+            rolled += 1
+    return total
 
 
 class GeneralCog(Cog):
@@ -56,7 +72,7 @@ class GeneralCog(Cog):
             await inter.followup.send(embed=embed)
             return
 
-        entry_list: list[str] = clean_entries(entries.split(","))
+        entry_list: list[str] = [entry for entry in map(str.strip, entries.split(",")) if entry]
         if not entry_list:
             embed = utils.err_embed("Nenhum participante foi encontrado.")
             await inter.followup.send(embed=embed)
@@ -68,14 +84,10 @@ class GeneralCog(Cog):
             await inter.followup.send(embed=embed)
             return
 
-        shuffle(entry_list)
-        winner_list: list[str] = sample(entry_list, winners)
+        winner_list: list[str] = RAFFLE_RANDOM.sample(entry_list, winners)
         winner_str: str = "\n".join(f"• {winner.capitalize()}" for winner in winner_list)
 
-        main_desc: str = dedent(f"""
-            Entradas: **{entry_count}**
-            Sorteados: **{winners}**
-        """)
+        main_desc: str = RAFFLE_TEMPLATE.format(entries=entry_count, winners=winners)
 
         embed = Embed(description=main_desc,
                       color=utils.COLOR_DEF)
@@ -107,7 +119,7 @@ class GeneralCog(Cog):
             await inter.followup.send(embed=embed)
             return
 
-        if sides + amount + modifier > DICE_LIMIT:
+        if amount > DICE_LIMIT or sides + amount + modifier > DICE_LIMIT:
             embed = utils.err_embed("Valores muito grandes foram inseridos.")
             await inter.followup.send(embed=embed)
             return
@@ -116,7 +128,7 @@ class GeneralCog(Cog):
         if modifier != 0:
             modifier_signal = f"+{modifier}" if modifier > 0 else str(modifier)
 
-        number: int = randint(1, (sides * amount)) + modifier
+        number: int = roll_dice(sides, amount) + modifier
         dice_note: str = f"{amount}d{sides}{modifier_signal}"
 
         embed = Embed(description=f"Um **{dice_note}** foi lançado e o resultado foi **{number}**.",
@@ -135,10 +147,7 @@ class GeneralCog(Cog):
         diff_dir: int = int((dir_time - inter_time) * 1000)
         diff_defer: int = int((defer_time - inter_time) * 1000)
 
-        desc_str: str = dedent(f"""
-            Latência Direta: **{diff_dir}ms**
-            Latência Adiada: **{diff_defer}ms**
-        """)
+        desc_str: str = PING_TEMPLATE.format(direct=diff_dir, deferred=diff_defer)
 
         embed = Embed(description=desc_str,
                       color=utils.COLOR_DEF)
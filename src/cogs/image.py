@@ -1,16 +1,17 @@
 """Image-related commands."""
 
+import asyncio
 import textwrap
 from io import BytesIO
-from os import unlink
-from pathlib import Path
-from tempfile import NamedTemporaryFile, _TemporaryFileWrapper
-from typing import Any, Optional, Self
+from os import cpu_count
+from tempfile import SpooledTemporaryFile
+from typing import IO, Any, Optional, Self
 
 import httpx
+import orjson
 from discord import Attachment, Embed, File, Interaction
 from discord.app_commands import CheckFailure, Group, command
-from httpx import UnsupportedProtocol
+from httpx import InvalidURL, UnsupportedProtocol
 from PIL import Image
 
 import src.utils as utils
@@ -28,17 +29,23 @@ cfg.parse_section("Images", {
 IMGS_ENABLED = cfg.getboolean("Images", "enabled")
 
 MAX_FILESIZE = 1e7
+CHUNK_SIZE = 65536
+SPOOL_SIZE = 1 << 20
 
 MAX_SCALE = 3.0
 MIN_SCALE = 0.2
 
-ALLOWED_MIMES: tuple[str, ...] = (
+GIF_COLORS = 128
+
+ALLOWED_MIMES: frozenset[str] = frozenset({
     "image/png",
     "image/jpeg",
     "image/bmp",
     "image/webp",
     "image/gif"
-)
+})
+
+STATIC_MIMES = ALLOWED_MIMES - {"image/gif"}
 
 TITLE_LANGS: dict[str, str] = {
     "english": ":flag_gb:",
@@ -46,67 +53,162 @@ TITLE_LANGS: dict[str, str] = {
     "romaji": ":pencil:",
 }
 
+ANIME_API_URL = "https://api.trace.moe/search"
+# httpx drops the URL query when params are passed
+ANIME_API_PARAMS: dict[str, str] = {"anilistInfo": ""}
+
+ANIME_API_ERRORS: dict[int, str] = {
+    400: "A API não foi capaz de decodificar a imagem enviada.",
+    403: "A API não conseguiu extrair imagens do URL enviado.",
+    404: "A API não conseguiu extrair imagens do URL enviado.",
+    405: "A API relatou que o método HTTP usado foi incorreto.",
+    500: "O servidor da API relatou um erro interno.",
+    503: "O banco de dados da API não está respondendo.",
+    504: "O servidor da API está sobrecarregado.",
+}
+
+ANIME_INFO_TEMPLATE = textwrap.dedent("""\
+    Episódio: **{episode}**
+    Minuto: **{minutes:02d}:{seconds:02d}**
+    Similaridade: **{similarity}%**
+""")
+
+gif_semaphore = asyncio.Semaphore(cpu_count() or 1)
+
+image_client = httpx.AsyncClient(
+    timeout=30,
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60)
+)
+
+
+def is_http_url(url: str) -> bool:
+    """Checks if an URL uses a scheme the bot is willing to fetch."""
+    return url.lower().startswith(("http://", "https://"))
+
+
+def prepare_url(url: str) -> str:
+    """Validates an user URL and points known pages to their raw image."""
+    if not is_http_url(url):
+        raise InvalidURL("Only HTTP and HTTPS URLs are accepted.")
+
+    if url.startswith("https://tenor.com/") and not url.endswith(".gif"):
+        url += ".gif"
+
+    return url
+
+
+def check_mime(mime: Optional[str], accept: frozenset[str]) -> str:
+    """Returns the MIME type if it is accepted, raising NotAllowedMime otherwise."""
+    mime = mime or "application/octet-stream"
+    if mime not in accept:
+        raise NotAllowedMime(mime)
+    return mime
+
+
+def check_response(response: httpx.Response, accept: frozenset[str]) -> str:
+    """Validates an image response from its headers alone, returning its MIME type."""
+    if response.status_code != 200:
+        raise ValueError("For some reason, the image is None.")
+
+    if int(response.headers.get("Content-Length", 0)) > MAX_FILESIZE:
+        raise FileSizeExceeded
+
+    return check_mime(response.headers.get("Content-Type"), accept)
+
 
 class ImageHandler:
     """A wrapper for padronizing Attachments and pure URLs."""
 
     @classmethod
-    async def from_attachment(cls, attach: Attachment) -> Self:
+    async def from_attachment(cls, attach: Attachment, accept: frozenset[str] = ALLOWED_MIMES) -> Self:
         if attach.size > MAX_FILESIZE:
             raise FileSizeExceeded
 
+        mime = check_mime(attach.content_type, accept)
+
         return cls(
             url=attach.url,
-            content=await attach.read(),
-            mime=attach.content_type,
+            content=BytesIO(await attach.read()),
+            mime=mime,
             size=attach.size
         )
 
     @classmethod
-    async def from_url(cls, url: str) -> Self:
-        if url.startswith("https://tenor.com/") and not url.endswith(".gif"):
-            url += ".gif"
-
-        async with httpx.AsyncClient() as client:
-            # Just for checking the content first
-            head = await client.head(url, follow_redirects=True)
-            if int(head.headers.get("Content-Length", 0)) > MAX_FILESIZE:
-                raise FileSizeExceeded
-
-            # Actual request
-            response = await client.get(head.url)
-
-        if response.status_code == 200:
-            return cls(
-                url=url,
-                content=response.content,
-                mime=response.headers.get("Content-Type"),
-                size=len(response.content)
-            )
-        raise ValueError("For some reason, the image is None.")
+    async def from_url(cls, url: str, accept: frozenset[str] = ALLOWED_MIMES) -> Self:
+        url = prepare_url(url)
+
+        async with image_client.stream("GET", url, follow_redirects=True) as response:
+            mime = check_response(response, accept)
+
+            buffer = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+            size = 0
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILESIZE:
+                    buffer.close()
+                    raise FileSizeExceeded
+                buffer.write(chunk)
+
+        buffer.seek(0)
+        return cls(
+            url=url,
+            content=buffer,
+            mime=mime,
+            size=size
+        )
 
     def __init__(self,
                  url: str,
-                 content: bytes,
-                 mime: Optional[str],
+                 content: IO[bytes],
+                 mime: str,
                  size: int) -> None:
         self.url = url
-        self.content = BytesIO(content)
-        self.mime = mime or "application/octet-stream"
+        self.content = content
+        self.mime = mime
         self.size = size
 
-        if self.mime not in ALLOWED_MIMES:
-            raise NotAllowedMime(self.mime)
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Releases the buffer, deleting its temporary file if it has one."""
+        self.content.close()
 
 
 async def call_anime_api(image: ImageHandler) -> Embed:
     """Returns a Discord embed containing info about an anime frame."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post("https://api.trace.moe/search?anilistInfo",
-                                     files={"image": image.content})
+    image.content.seek(0)
+    response = await image_client.post(ANIME_API_URL,
+                                       params=ANIME_API_PARAMS,
+                                       files={"image": image.content})
+    return anime_embed(response)
+
+
+async def validate_url(url: str) -> None:
+    """Checks the size and type of an image URL without downloading its body."""
+    async with image_client.stream("GET", url, follow_redirects=True) as response:
+        check_response(response, ALLOWED_MIMES)
+
+
+async def call_anime_api_url(url: str) -> Embed:
+    """Same as call_anime_api, but lets the API fetch the URL while it is validated here."""
+    url = prepare_url(url)
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(validate_url(url))
+        api_task = group.create_task(image_client.get(ANIME_API_URL,
+                                                      params=ANIME_API_PARAMS | {"url": url}))
+
+    return anime_embed(api_task.result())
+
 
+def anime_embed(response: httpx.Response) -> Embed:
+    """Builds the embed for a trace.moe search response."""
     if response.status_code == 200:
-        data: dict[str, Any] = response.json()["result"][0]
+        data: dict[str, Any] = orjson.loads(response.content)["result"][0]
 
         if data["anilist"]["isAdult"]:
             return utils.err_embed("O melhor palpite não pode ser exibido pois encontrou conteúdo adulto.")
@@ -128,42 +230,24 @@ async def call_anime_api(image: ImageHandler) -> Embed:
         embed.add_field(name="Nome", value=titles_text)
 
         minutes, seconds = divmod(int(data["from"]), 60)
-        info_text = textwrap.dedent(f"""\
-            Episódio: **{data.get("episode", "N/A")}**
-            Minuto: **{minutes:02d}:{seconds:02d}**
-            Similaridade: **{similarity}%**
-        """)
+        info_text = ANIME_INFO_TEMPLATE.format(episode=data.get("episode", "N/A"),
+                                               minutes=minutes,
+                                               seconds=seconds,
+                                               similarity=similarity)
         embed.add_field(name="Dados", value=info_text)
 
         embed.set_image(url=data["image"] + "&size=l")
         return embed
 
-    else:
-        match response.status_code:
-            case 400:
-                return utils.err_embed("A API não foi capaz de decodificar a imagem enviada.")
+    message = ANIME_API_ERRORS.get(response.status_code,
+                                   "Ocorreu um erro HTTP com status não catalogado.")
+    return utils.err_embed(message)
 
-            case 403 | 404:
-                return utils.err_embed("A API não conseguiu extrair imagens do URL enviado.")
 
-            case 405:
-                return utils.err_embed("A API relatou que o método HTTP usado foi incorreto.")
-
-            case 500:
-                return utils.err_embed("O servidor da API relatou um erro interno.")
-
-            case 503:
-                return utils.err_embed("O banco de dados da API não está respondendo.")
-
-            case 504:
-                return utils.err_embed("O servidor da API está sobrecarregado.")
-
-            case _:
-                return utils.err_embed("Ocorreu um erro HTTP com status não catalogado.")
-
-
-def save_gif(tmpfile: _TemporaryFileWrapper, imgbytes: BytesIO, scale: Optional[float] = None) -> Path:
-    """Converts a image BytesIO to a GIF then saves it."""
+def save_gif(imgbytes: IO[bytes],
+             scale: Optional[float] = None,
+             resample: Image.Resampling = Image.Resampling.BILINEAR) -> BytesIO:
+    """Converts a image file to a GIF, returning it in a new BytesIO."""
     with Image.open(imgbytes) as file:
         if scale:
             size = file.size
@@ -174,9 +258,20 @@ def save_gif(tmpfile: _TemporaryFileWrapper, imgbytes: BytesIO, scale: Optional[
             if max(newsize) > 2048:
                 raise ImageTooBig
 
-            file = file.resize(newsize)
-        file.save(tmpfile.name, "GIF")
-    return Path(tmpfile.name)
+            if newsize != size:
+                # Only JPEGs can be downscaled while decoding
+                if scale < 1:
+                    file.draft("RGB", newsize)
+                file = file.resize(newsize, resample)
+
+        if file.mode == "RGB":
+            file = file.quantize(GIF_COLORS, Image.Quantize.FASTOCTREE)
+
+        output = BytesIO()
+        file.save(output, "GIF", optimize=False)
+
+    output.seek(0)
+    return output
 
 
 def normalize_mime(mime: str) -> str:
@@ -184,9 +279,21 @@ def normalize_mime(mime: str) -> str:
     return mime.split("/")[-1].split(";")[0].upper()
 
 
+ALLOWED_MIMES_TEXT = "\n".join(f"• **{normalize_mime(mime)}**" for mime in sorted(ALLOWED_MIMES))
+
+NOT_ALLOWED_MIME_TEMPLATE = textwrap.dedent("""\
+    O seu arquivo é do tipo inválido \"**{mime}**\".
+
+    Tipos suportados:
+""") + ALLOWED_MIMES_TEXT
+
+
 def handle_shared_errors(error: Exception) -> Embed:
     """Handles common errors that can occur in image commands."""
     match error:
+        case ExceptionGroup():
+            return handle_shared_errors(error.exceptions[0])
+
         case FileSizeExceeded():
             return utils.err_embed("O arquivo enviado é pesado demais para ser processado.")
 
@@ -196,16 +303,14 @@ def handle_shared_errors(error: Exception) -> Embed:
         case ImageTooSmall():
             return utils.err_embed("A imagem resultante é pequena demais.")
 
-        case UnsupportedProtocol():
+        case UnsupportedProtocol() | InvalidURL():
             return utils.err_embed("O URL enviado não é válido.")
 
-        case NotAllowedMime() as err:
-            return utils.err_embed(textwrap.dedent(f"""\
-                O seu arquivo é do tipo inválido \"**{normalize_mime(err.mime)}**\".
+        case NotAllowedMime(mime="image/gif"):
+            return utils.err_embed("Bem... isso já parece ser um GIF.")
 
-                Tipos suportados:
-                {"\n".join(list(map(lambda x: f"• **{normalize_mime(x)}**", ALLOWED_MIMES)))}
-            """))
+        case NotAllowedMime() as err:
+            return utils.err_embed(NOT_ALLOWED_MIME_TEMPLATE.format(mime=normalize_mime(err.mime)))
         case _:
             return utils.err_embed("Algo deu errado.")
 
@@ -256,26 +361,23 @@ class ImgGroup(Group):
 
         try:
             if file:
-                image = await ImageHandler.from_attachment(file)
+                image = await ImageHandler.from_attachment(file, STATIC_MIMES)
             elif url:
-                image = await ImageHandler.from_url(url)
+                image = await ImageHandler.from_url(url, STATIC_MIMES)
             assert image
 
-            if image.mime == "image/gif":
-                embed = utils.err_embed("Bem... isso já parece ser um GIF.")
-                await inter.followup.send(embed=embed)
-                return
-
-            temp_file = NamedTemporaryFile(suffix=".gif", delete=False)
-            path = save_gif(temp_file, image.content, scale)
+            async with gif_semaphore:
+                gif = await asyncio.to_thread(save_gif, image.content, scale)
 
-            await inter.followup.send(file=File(path))
-            temp_file.close()
-            unlink(path)
+            await inter.followup.send(file=File(gif, filename="image.gif"))
 
         except Exception as err:
             await inter.followup.send(embed=handle_shared_errors(err))
 
+        finally:
+            if image:
+                image.close()
+
     @command(
         name="find-anime",
     )
@@ -298,11 +400,12 @@ class ImgGroup(Group):
 
         try:
             if file:
-                embed = await call_anime_api(await ImageHandler.from_attachment(file))
+                with await ImageHandler.from_attachment(file) as image:
+                    embed = await call_anime_api(image)
                 await inter.followup.send(embed=embed)
 
             elif url:
-                embed = await call_anime_api(await ImageHandler.from_url(url))
+                embed = await call_anime_api_url(url)
                 await inter.followup.send(embed=embed)
 
         except Exception as err:
@@ -328,3 +431,7 @@ class NotAllowedMime(Exception):
 
 async def setup(bot: CustomBot) -> None:
     bot.tree.add_command(ImgGroup(bot))
+
+
+async def teardown(bot: CustomBot) -> None:
+    await image_client.aclose()
@@ -2,12 +2,17 @@
 
 import asyncio
 import re
-from textwrap import dedent, shorten
+from dataclasses import dataclass
+from functools import lru_cache
+from textwrap import TextWrapper, dedent
 from typing import Any, Optional, Self
 
 import httpx
+import orjson
+from cachetools import TTLCache
 from discord import Colour, Embed, Interaction
 from discord.app_commands import Group, command, rename
+from discord.ext.commands import Cog
 from httpx import Response
 
 from src.bot import CustomBot
@@ -20,48 +25,121 @@ PRIV_TEXT = "[Privado]"
 COLOR_STEAM = Colour.from_rgb(40, 71, 101)
 MAX_DESC_LEN = 500
 
+ID_PATTERN = re.compile(
+    r"STEAM_[0-1]:(?P<auth>[0-1]):(?P<account>[0-9]+)$"
+    r"|\[U:1:(?P<id3>[0-9]{1,10})\]$"
+    r"|(?P<id64>[0-9]{17})/?$"
+    r"|(?P<id32>[0-9]{1,10})/?$"
+    r"|(?P<vanity>[a-zA-Z0-9_\-]+)/?$"
+)
+
+WORKSHOP_ID_PATTERN = re.compile(r"([0-9]+)$")
+
+# BBCode tags and links
+DESC_PATTERN = re.compile(r"(\[/?[^\]]+\])|(https?://\S+)")
+DESC_WRAPPER = TextWrapper(width=MAX_DESC_LEN, max_lines=1, placeholder=" [...]")
+
+USER_TEMPLATE = dedent("""
+    Nível: **{level}**
+    Criado: **{join}**
+    Visto: **{seen}**
+    Amigos: **{friends}**
+    País: **{country}**
+""")
+
+IDS_TEMPLATE = dedent("""
+    ID2: **{steam2}**
+    ID3: **{steam3}**
+    ID32: **{id32}**
+    ID64: **{id64}**
+""")
+
+WORKSHOP_DATA_TEMPLATE = dedent("""
+    ID: **{id}**
+    Tamanho: **{size} MiB**
+    Postado: **{created}**
+    Atualizado: **{updated}**
+""")
+
+WORKSHOP_STATS_TEMPLATE = dedent("""
+    👁️ {views:,}
+    📥 {subs:,} ({subs_life:,} no total)
+    ⭐ {favs:,} ({favs_life:,} no total)
+""")
+
+MAX_CONCURRENCY = 16
+MAX_RETRIES = 3
+
+CACHE_SIZE = 1024
+USER_CACHE_TTL = 60
+WORKSHOP_CACHE_TTL = 300
+VANITY_CACHE_SIZE = 4096
+VANITY_CACHE_TTL = 86400
+
+user_cache: TTLCache[int, "SteamUser"] = TTLCache(maxsize=CACHE_SIZE, ttl=USER_CACHE_TTL)
+workshop_cache: TTLCache[str, "SteamWorkItem"] = TTLCache(maxsize=CACHE_SIZE, ttl=WORKSHOP_CACHE_TTL)
+vanity_cache: TTLCache[str, int] = TTLCache(maxsize=VANITY_CACHE_SIZE, ttl=VANITY_CACHE_TTL)
+
+# Fetches still running, keyed by SteamID64
+user_requests: dict[int, asyncio.Task["SteamUser"]] = {}
+
 
 class SteamAPI:
     """A class to interact with the Steam API."""
 
     def __init__(self, api_key: str) -> None:
         self.api_key = api_key
+        self.client = httpx.AsyncClient(
+            base_url="https://api.steampowered.com",
+            params={"key": api_key},
+            timeout=10,
+            limits=httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=8)
+        )
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
 
-        self.__validate_key()
-
-    def __validate_key(self) -> None:
+    async def validate_key(self) -> None:
         """Simply checks if the API key is valid."""
-        response = httpx.get(f"https://api.steampowered.com/ISteamWebAPIUtil/GetSupportedAPIList/v1/?key={self.api_key}",
-                             timeout=10)
-        if response.status_code == 200 and response.json()["apilist"]["interfaces"]:
+        response = await self.get("ISteamWebAPIUtil/GetSupportedAPIList", 1)
+        if response.status_code == 200 and orjson.loads(response.content)["apilist"]["interfaces"]:
             return
 
         raise InvalidSteamKey("The provided Steam key could not be validated.")
 
     @staticmethod
-    def __kwargs_to_query(kwargs: dict[str, Any]) -> str:
-        """Converts kwargs to query strings."""
-        kwargs_out: str = ""
+    def __kwargs_to_params(kwargs: dict[str, Any]) -> dict[str, Any]:
+        """Converts kwargs to query params, using the indexed form Steam expects for lists."""
+        params: dict[str, Any] = {}
         for key, value in kwargs.items():
-            # "stuffs=[123, 321]"
+            # "stuffs[0]=123&stuffs[1]=321"
             if isinstance(value, list):
-                values: list[tuple[int, Any]] = list(enumerate(value))
-                for pair in values:
-                    kwargs_out += f"&{key}[{pair[0]}]={pair[1]}"
+                params.update((f"{key}[{index}]", item) for index, item in enumerate(value))
                 continue
 
             # "stuff=123"
-            kwargs_out += f"&{key}={value}"
+            params[key] = value
 
-        return kwargs_out
+        return params
 
     async def get(self, interface: str, version: int, **kwargs) -> Response:
         """Sends a async GET request to the Steam API."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"https://api.steampowered.com/{interface}/v{version}/?key={self.api_key}" +
-                                        self.__kwargs_to_query(kwargs))
+        url = f"/{interface}/v{version}/"
+        params = self.__kwargs_to_params(kwargs)
+
+        for attempt in range(MAX_RETRIES):
+            async with self.semaphore:
+                response = await self.client.get(url, params=params)
+
+            # Rate limited
+            if response.status_code != 429 or attempt == MAX_RETRIES - 1:
+                break
+            await asyncio.sleep(2 ** attempt)
+
         return response
 
+    async def close(self) -> None:
+        """Closes the underlying HTTP connections."""
+        await self.client.aclose()
+
 
 class SteamID:
     """A class to handle SteamID conversions."""
@@ -69,31 +147,44 @@ class SteamID:
     # Useful SteamID conversion info can be found at:
     # https://developer.valvesoftware.com/wiki/SteamID
 
+    __slots__ = ("id64", "id32", "steam2", "steam3")
+
     @classmethod
-    async def from_guess(cls, input_str: str) -> Self:
+    @lru_cache(maxsize=4096)
+    def from_id64(cls, id64: int) -> Self:
+        """Builds a SteamID, reusing the instance of recently seen IDs."""
+        return cls(id64)
+
+    @classmethod
+    async def from_guess(cls, api: SteamAPI, input_str: str) -> Self:
         """Tries to convert any input to a 64bit SteamID."""
-        # ID 2
-        if match := re.search(r"STEAM_1:([0-1]):([0-9]+)$", input_str):
-            return cls((int(match.group(2)) * 2) + CONST_ID64 + int(match.group(1)))
+        found = ID_PATTERN.search(input_str)
+        if not found:
+            raise IdNotFound
+
+        match found.lastgroup:
+            case "account":
+                return cls.from_id64((int(found["account"]) * 2) + CONST_ID64 + int(found["auth"]))
 
-        # ID 3
-        if match := re.search(r"\[U:1:([0-9]{1,10})\]$", input_str):
-            return cls(int(match.group(1)) + CONST_ID64)
+            case "id3":
+                return cls.from_id64(int(found["id3"]) + CONST_ID64)
 
-        # ID 64
-        if match := re.search(r"([0-9]{17})/?$", input_str):
-            return cls(int(match.group(1)))
+            case "id64":
+                return cls.from_id64(int(found["id64"]))
 
-        # ID 32
-        if match := re.search(r"([0-9]{1,10})/?$", input_str):
-            return cls(int(match.group(1)) + CONST_ID64)
+            case "id32":
+                return cls.from_id64(int(found["id32"]) + CONST_ID64)
 
-        # Vanity
-        if match := re.search(r"([a-zA-Z-0-9_\-]+)/?$", input_str):
-            response = await api.get("ISteamUser/ResolveVanityURL", 1, vanityurl=match.group(1))
-            data: dict[str, Any] = response.json()
-            if response.status_code == 200 and data["response"]["success"] == 1:
-                return cls(int(data["response"]["steamid"]))
+            case "vanity":
+                vanity: str = found["vanity"]
+                if id64 := vanity_cache.get(vanity):
+                    return cls.from_id64(id64)
+
+                response = await api.get("ISteamUser/ResolveVanityURL", 1, vanityurl=vanity)
+                data: dict[str, Any] = orjson.loads(response.content)
+                if response.status_code == 200 and data["response"]["success"] == 1:
+                    id64 = vanity_cache[vanity] = int(data["response"]["steamid"])
+                    return cls.from_id64(id64)
 
         raise IdNotFound
 
@@ -108,19 +199,54 @@ class SteamID:
         return self.id64 - CONST_ID64
 
     def __to_steam2(self) -> str:
-        weird_bit: int = int(bin(self.id64)[-1])
+        weird_bit: int = self.id64 & 1
         return f"STEAM_1:{weird_bit}:{(self.id64 - CONST_ID64 - weird_bit) // 2}"
 
     def __to_steam3(self) -> str:
         return f"[U:1:{self.id64 - CONST_ID64}]"
 
 
+@dataclass(frozen=True, slots=True)
 class SteamUser:
     """Represents a Steam user."""
 
+    id: SteamID
+    name: str
+    avatar: str
+    url: str
+    level: Optional[int]
+
+    vacban_amount: int
+    gameban_amount: int
+    days_no_ban: int
+
+    vacban_status: bool
+    gameban_status: bool
+    commban_status: bool
+    tradeban_status: bool
+
+    join: Optional[int]
+    seen: Optional[int]
+    friend_amount: Optional[int]
+    country: Optional[str]
+    background: str
+
     @classmethod
-    async def from_steamid(cls, steamid: SteamID) -> Self:
+    async def from_steamid(cls, api: SteamAPI, steamid: SteamID) -> Self:
         """Fetches Steam user details using a SteamID."""
+        if cached := user_cache.get(steamid.id64):
+            return cached
+
+        task = user_requests.get(steamid.id64)
+        if task is None:
+            task = user_requests[steamid.id64] = asyncio.create_task(cls.__fetch(api, steamid))
+            task.add_done_callback(lambda _: user_requests.pop(steamid.id64, None))
+
+        return await asyncio.shield(task)
+
+    @classmethod
+    async def __fetch(cls, api: SteamAPI, steamid: SteamID) -> Self:
+        """Requests every endpoint a SteamUser needs and caches the result."""
         summ, bans, friends, level, customs = await asyncio.gather(
             api.get("ISteamUser/GetPlayerSummaries", 2, steamids=steamid.id64),
             api.get("ISteamUser/GetPlayerBans", 1, steamids=steamid.id64),
@@ -129,116 +255,116 @@ class SteamUser:
             api.get("IPlayerService/GetProfileItemsEquipped", 1, steamid=steamid.id64)
         )
 
-        summ = summ.raise_for_status().json()["response"]["players"][0]
-        bans = bans.raise_for_status().json()["players"][0]
-        friends = friends.raise_for_status().json()["friendslist"]["friends"] if friends.status_code == 200 else None
-        level = level.raise_for_status().json()["response"]
-        customs = customs.raise_for_status().json()["response"]
-
-        return cls(steamid, summ, bans, friends, level, customs)
-
-    def __init__(self,
-                 steamid: SteamID,
-                 summary: dict[str, Any],
-                 bans: dict[str, Any],
-                 friends: Optional[list[dict[str, Any]]],
-                 level: dict[str, Any],
-                 customs: dict[str, dict[str, Any]]) -> None:
-        """Should not be called directly, use `from_steamid` instead."""
-        self.id = steamid
-        self.r_summary = summary
-        self.r_bans = bans
-        self.r_friends = friends
-        self.r_level = level
-        self.r_customs = customs
-
-        self.name: str = self.r_summary["personaname"]
-        self.avatar: str = self.r_summary["avatarfull"]
-        self.url = f"https://steamcommunity.com/profiles/{self.id.id64}"
-        self.level: Optional[int] = self.r_level.get("player_level", None)
-
-        self.vacban_amount: int = self.r_bans["NumberOfVACBans"]
-        self.gameban_amount: int = self.r_bans["NumberOfGameBans"]
-        self.days_no_ban: int = self.r_bans["DaysSinceLastBan"]
-
-        self.vacban_status: bool = self.r_bans["VACBanned"]
-        self.gameban_status: bool = self.r_bans["NumberOfGameBans"] > 0
-        self.commban_status: bool = self.r_bans["CommunityBanned"]
-        self.tradeban_status: bool = self.r_bans["EconomyBan"] != "none"
-
-        self.join: Optional[int] = self.r_summary.get("timecreated")
-        self.seen: Optional[int] = self.r_summary.get("lastlogoff")
-
-    @property
-    def friend_amount(self) -> Optional[int]:
-        if self.r_friends:
-            return len(self.r_friends)
-        return None
-
-    @property
-    def country(self) -> Optional[str]:
-        country: Optional[str] = self.r_summary.get("loccountrycode")
-        if country:
-            return f":flag_{country.lower()}:"
-        return None
-
-    @property
-    def background(self) -> str:
-        url: Optional[str] = self.r_customs["profile_background"].get("image_large")
-        if url:
-            return f"https://steamcdn-a.akamaihd.net/steamcommunity/public/images/{url}"
-        return "https://steamcommunity-a.akamaihd.net/public/images/profile/2020/bg_dots.png"
+        summ = orjson.loads(summ.raise_for_status().content)["response"]["players"][0]
+        bans = orjson.loads(bans.raise_for_status().content)["players"][0]
+        friends = orjson.loads(friends.raise_for_status().content)["friendslist"]["friends"] if friends.status_code == 200 else None
+        level = orjson.loads(level.raise_for_status().content)["response"]
+        customs = orjson.loads(customs.raise_for_status().content)["response"]
+
+        country: Optional[str] = summ.get("loccountrycode")
+        background: Optional[str] = customs["profile_background"].get("image_large")
+
+        user = user_cache[steamid.id64] = cls(
+            id=steamid,
+            name=summ["personaname"],
+            avatar=summ["avatarfull"],
+            url=f"https://steamcommunity.com/profiles/{steamid.id64}",
+            level=level.get("player_level", None),
+
+            vacban_amount=bans["NumberOfVACBans"],
+            gameban_amount=bans["NumberOfGameBans"],
+            days_no_ban=bans["DaysSinceLastBan"],
+
+            vacban_status=bans["VACBanned"],
+            gameban_status=bans["NumberOfGameBans"] > 0,
+            commban_status=bans["CommunityBanned"],
+            tradeban_status=bans["EconomyBan"] != "none",
+
+            join=summ.get("timecreated"),
+            seen=summ.get("lastlogoff"),
+            # None means a private friend list
+            friend_amount=len(friends) if friends is not None else None,
+            country=f":flag_{country.lower()}:" if country else None,
+            background=(f"https://steamcdn-a.akamaihd.net/steamcommunity/public/images/{background}"
+                        if background else
+                        "https://steamcommunity-a.akamaihd.net/public/images/profile/2020/bg_dots.png")
+        )
+        return user
+
 
+def clean_description(text: str) -> str:
+    """Strips BBCode tags and links from a workshop description."""
+    if "[" not in text and "http" not in text:
+        return text
+    return DESC_PATTERN.sub("", text)
 
+
+@dataclass(frozen=True, slots=True)
 class SteamWorkItem:
     """Represents a Steam Workshop item."""
 
+    id: str
+    title: str
+    preview: str
+    url: str
+    tags: str
+    description: str
+
+    view_amount: int
+    sub_amount: int
+    sub_amount_life: int
+    fav_amount: int
+    fav_amount_life: int
+
+    file_size: int
+    create_date: int
+    update_date: int
+
     @classmethod
-    async def from_url(cls, url: str) -> Self:
+    async def from_url(cls, api: SteamAPI, url: str) -> Self:
         """Fetches a Steam Workshop item using its URL or ID."""
-        if match := re.search(r"([0-9]+)$", url):
+        if match := WORKSHOP_ID_PATTERN.search(url):
+            workid = match.group(1)
+            if cached := workshop_cache.get(workid):
+                return cached
+
             response = await api.get("IPublishedFileService/GetDetails",
                                      1,
                                      itemcount=1,
-                                     publishedfileids=[match.group(1)])
-            data: dict[str, Any] = response.json()
+                                     publishedfileids=[workid])
+            data: dict[str, Any] = orjson.loads(response.content)
             if response.status_code == 200 and data["response"]["publishedfiledetails"][0]["result"] == 1:
-                return cls(match.group(1), data["response"]["publishedfiledetails"][0])
+                details: dict[str, Any] = data["response"]["publishedfiledetails"][0]
+
+                item = workshop_cache[workid] = cls(
+                    id=workid,
+                    title=details["title"],
+                    preview=details["preview_url"],
+                    url=f"https://steamcommunity.com/sharedfiles/filedetails/?id={workid}",
+                    tags=", ".join([tag["display_name"] for tag in details["tags"]]),
+                    description=clean_description(details["file_description"]),
+
+                    view_amount=details["views"],
+                    sub_amount=details["subscriptions"],
+                    sub_amount_life=details["lifetime_subscriptions"],
+                    fav_amount=details["favorited"],
+                    fav_amount_life=details["lifetime_favorited"],
+
+                    file_size=int(details["file_size"]),
+                    create_date=details["time_created"],
+                    update_date=details["time_updated"]
+                )
+                return item
 
         raise IdNotFound
 
-    def __init__(self,
-                 workid: str,
-                 details: dict[str, Any]) -> None:
-        """Should not be called directly, use `from_url` instead."""
-        self.r_details = details
-        self.id = workid
-
-        self.title: str = self.r_details["title"]
-        self.preview: str = self.r_details["preview_url"]
-        self.url: str = f"https://steamcommunity.com/sharedfiles/filedetails/?id={self.id}"
-        self.tags: str = ", ".join([tag["display_name"] for tag in self.r_details["tags"]])
-
-        self.view_amount: int = self.r_details["views"]
-        self.sub_amount: int = self.r_details["subscriptions"]
-        self.sub_amount_life: int = self.r_details["lifetime_subscriptions"]
-        self.fav_amount: int = self.r_details["favorited"]
-        self.fav_amount_life: int = self.r_details["lifetime_favorited"]
-
-        self.file_size: int = int(details["file_size"])
-        self.create_date: int = self.r_details["time_created"]
-        self.update_date: int = self.r_details["time_updated"]
-
-    @property
-    def description(self) -> str:
-        return re.sub(r"(\[/?[^\]]+\])|(https?://\S+)", "", self.r_details["file_description"])
-
 
 class SteamGroup(Group):
 
-    def __init__(self, bot: CustomBot) -> None:
+    def __init__(self, bot: CustomBot, api: SteamAPI) -> None:
         super().__init__(name="steam", description="Comandos relacionados ao Steam.")
         self.bot = bot
+        self.api = api
 
     @command()
     @rename(given_id="id")
@@ -250,23 +376,21 @@ class SteamGroup(Group):
         """
         await inter.response.defer()
         try:
-            userid = await SteamID.from_guess(given_id)
-            user = await SteamUser.from_steamid(userid)
-
-            desc: str = dedent(f"""
-                Nível: **{user.level if user.level is not None else PRIV_TEXT}**
-                Criado: **{to_timestamp(user.join, Timestamp.LongDate) if user.join else PRIV_TEXT}**
-                Visto: **{to_timestamp(user.seen, Timestamp.LongDate) if user.seen else PRIV_TEXT}**
-                Amigos: **{user.friend_amount or PRIV_TEXT}**
-                País: **{user.country or PRIV_TEXT}**
-            """)
-
-            ids_field: str = dedent(f"""
-                ID2: **{user.id.steam2}**
-                ID3: **{user.id.steam3}**
-                ID32: **{user.id.id32}**
-                ID64: **{user.id.id64}**
-            """)
+            userid = await SteamID.from_guess(self.api, given_id)
+            user = await SteamUser.from_steamid(self.api, userid)
+
+            desc: str = USER_TEMPLATE.format(
+                level=user.level if user.level is not None else PRIV_TEXT,
+                join=to_timestamp(user.join, Timestamp.LongDate) if user.join else PRIV_TEXT,
+                seen=to_timestamp(user.seen, Timestamp.LongDate) if user.seen else PRIV_TEXT,
+                friends=user.friend_amount if user.friend_amount is not None else PRIV_TEXT,
+                country=user.country or PRIV_TEXT
+            )
+
+            ids_field: str = IDS_TEMPLATE.format(steam2=user.id.steam2,
+                                                 steam3=user.id.steam3,
+                                                 id32=user.id.id32,
+                                                 id64=user.id.id64)
 
             bans: list[str] = []
             if user.vacban_status:
@@ -277,9 +401,7 @@ class SteamGroup(Group):
                 bans.append("⛔ Comunidade")
             if user.tradeban_status:
                 bans.append("⛔ Trocas")
-            if not bans:
-                bans.append("🟢 Nenhum")
-            bans_field: str = "\n".join(bans)
+            bans_field: str = "\n".join(bans) or "🟢 Nenhum"
 
             embed = Embed(description=desc,
                           color=COLOR_STEAM,
@@ -310,22 +432,24 @@ class SteamGroup(Group):
         """
         await inter.response.defer()
         try:
-            item = await SteamWorkItem.from_url(given_id)
-
-            data_field: str = dedent(f"""
-                ID: **{item.id}**
-                Tamanho: **{round(item.file_size / (2**20), 2)} MiB**
-                Postado: **{to_timestamp(item.create_date, Timestamp.ShortDate)}**
-                Atualizado: **{to_timestamp(item.update_date, Timestamp.ShortDate)}**
-            """)
-
-            stats_field: str = dedent(f"""
-                👁️ {format(item.view_amount, ",")}
-                📥 {format(item.sub_amount, ",")} ({format(item.sub_amount_life, ",")} no total)
-                ⭐ {format(item.fav_amount, ",")} ({format(item.fav_amount_life, ",")} no total)
-            """)
-
-            embed = Embed(description=shorten(item.description, MAX_DESC_LEN),
+            item = await SteamWorkItem.from_url(self.api, given_id)
+
+            data_field: str = WORKSHOP_DATA_TEMPLATE.format(
+                id=item.id,
+                size=round(item.file_size / (2**20), 2),
+                created=to_timestamp(item.create_date, Timestamp.ShortDate),
+                updated=to_timestamp(item.update_date, Timestamp.ShortDate)
+            )
+
+            stats_field: str = WORKSHOP_STATS_TEMPLATE.format(
+                views=item.view_amount,
+                subs=item.sub_amount,
+                subs_life=item.sub_amount_life,
+                favs=item.fav_amount,
+                favs_life=item.fav_amount_life
+            )
+
+            embed = Embed(description=DESC_WRAPPER.fill(" ".join(item.description.split())),
                           title=item.title.upper(),
                           url=item.url,
                           color=COLOR_STEAM)
@@ -345,6 +469,18 @@ class SteamGroup(Group):
             await inter.followup.send(embed=embed)
 
 
+class SteamCog(Cog):
+
+    def __init__(self, bot: CustomBot) -> None:
+        self.bot = bot
+
+    async def cog_unload(self) -> None:
+        # Runs before the tree drops this module's commands, unlike teardown
+        group = self.bot.tree.get_command("steam")
+        if isinstance(group, SteamGroup):
+            await group.api.close()
+
+
 class IdNotFound(Exception):
     pass
 
@@ -354,11 +490,18 @@ class InvalidSteamKey(Exception):
 
 
 async def setup(bot: CustomBot) -> None:
-    global api
-
     if not STEAM_KEY:
         print("The Steam key is blank. Skipping Steam commands...")
         return
 
     api = SteamAPI(STEAM_KEY)
-    bot.tree.add_command(SteamGroup(bot))
+    try:
+        await api.validate_key()
+
+    except (InvalidSteamKey, httpx.HTTPError) as err:
+        print(f"Could not validate the Steam key ({err}). Skipping Steam commands...")
+        await api.close()
+        return
+
+    bot.tree.add_command(SteamGroup(bot, api))
+    await bot.add_cog(SteamCog(bot))
@@ -1,5 +1,6 @@
 """A handle for config parsing."""
 
+import os
 from configparser import ConfigParser
 from pathlib import Path
 
@@ -15,12 +16,21 @@ class BotConfig(ConfigParser):
 
     def parse_section(self, name: str, def_values: dict) -> None:
         """Adds a section into the .ini if it not exists."""
+        dirty = False
+
         if not self.has_section(name):
             self[name] = def_values
+            dirty = True
 
         for key, value in def_values.items():
             if not self.has_option(name, key):
                 self[name][key] = str(value)
+                dirty = True
+
+        if not dirty:
+            return
 
-        with open(CONFIG_PATH, "w") as file:
+        temp_path = CONFIG_PATH.with_suffix(".ini.tmp")
+        with open(temp_path, "w") as file:
             self.write(file)
+        os.replace(temp_path, CONFIG_PATH)
@@ -1,10 +1,12 @@
 """A handler for the database."""
 
-from contextlib import contextmanager
+from contextlib import asynccontextmanager
 from os import makedirs, path
 from pathlib import Path
-from sqlite3 import Connection, Cursor, connect
-from typing import Generator
+from typing import AsyncGenerator, Optional
+
+import aiosqlite
+from aiosqlite import Connection, Cursor
 
 from src.config import BotConfig
 
@@ -16,20 +18,57 @@ cfg.parse_section("General", {
 
 
 DBDIR = Path(cfg.get("General", "dbdir"))
+DBPATH = DBDIR / "master.db"
+
+PRAGMAS: tuple[str, ...] = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
 
 if not path.exists(DBDIR):
     makedirs(DBDIR)
 
 
-@contextmanager
-def call_database() -> Generator[tuple[Connection, Cursor], None, None]:
-    """Creates a temporary connection for the database."""
-    conn = connect(path.join(DBDIR, "master.db"))
-    cursor = conn.cursor()
+connection: Optional[Connection] = None
+
+
+async def get_connection() -> Connection:
+    """Returns the shared autocommit connection, opening it on the first call."""
+    global connection
+
+    if connection is None:
+        new_conn = await aiosqlite.connect(DBPATH, isolation_level=None)
+        for pragma in PRAGMAS:
+            await new_conn.execute(pragma)
+
+        # May have been opened while waiting for the lock
+        if connection is None:
+            connection = new_conn
+        else:
+            await new_conn.close()
+    return connection
+
+
+async def close_connection() -> None:
+    """Closes the shared connection, if it was ever opened."""
+    global connection
+
+    if connection is not None:
+        await connection.close()
+        connection = None
+
+
+@asynccontextmanager
+async def call_database() -> AsyncGenerator[tuple[Connection, Cursor], None]:
+    """Creates a temporary cursor over the shared connection."""
+    conn = await get_connection()
+    cursor = await conn.cursor()
 
     try:
         yield conn, cursor
 
     finally:
-        cursor.close()
-        conn.close()
+        await cursor.close()
@@ -1,12 +1,16 @@
 """Multipurpose variables and functions."""
 
+import asyncio
 import re
+import time
+from collections import deque
 from enum import Enum
 from typing import Any, Optional, Union
 
-from discord import ButtonStyle, Colour, Embed, Interaction, Permissions
+from discord import ButtonStyle, Client, Colour, Embed, Interaction, Permissions, User
 from discord.ext.commands import Context
 from discord.ui import Button, View, button
+from discord.utils import escape_mentions
 
 
 COLOR_DEF = Colour.from_rgb(147, 112, 219)
@@ -16,6 +20,8 @@ COLOR_DEBUG = Colour.from_rgb(25, 25, 25)
 
 MAX_COMPLETE_OPTS = 25
 
+MENTION_PATTERN = re.compile(r"<@(&?)(\d+)>")
+
 
 class Timestamp(Enum):
     Default = ""
@@ -33,30 +39,36 @@ def err_embed(err_desc: Union[str, Exception], *, title: Optional[str] = None) -
     return Embed(title=title, description=err_desc, color=COLOR_ERR)
 
 
+async def get_or_fetch_user(bot: Client, user_id: int) -> User:
+    """Returns an user from the cache, fetching it from Discord on a miss."""
+    return bot.get_user(user_id) or await bot.fetch_user(user_id)
+
+
 async def remove_mentions(message: str, via: Union[Context, Interaction]) -> str:
     """Removes user, roles, @everyone and @here mentions from a string."""
     bot = via.client if isinstance(via, Interaction) else via.bot
     guild = via.guild
 
-    mentions = re.findall(r"<@(\d+)>", message)
-    roles = re.findall(r"<@&(\d+)>", message)
+    mentions = MENTION_PATTERN.findall(message)
+    user_ids = {int(mention_id) for is_role, mention_id in mentions if not is_role}
+    role_ids = {int(mention_id) for is_role, mention_id in mentions if is_role}
 
-    message = message.replace("@here", "@\u200bhere")
-    message = message.replace("@everyone", "@\u200beveryone")
+    users = await asyncio.gather(*(get_or_fetch_user(bot, user_id) for user_id in user_ids),
+                                 return_exceptions=True)
+    user_names: dict[int, str] = {user_id: user.display_name
+                                  for user_id, user in zip(user_ids, users)
+                                  if not isinstance(user, BaseException)}
 
-    for user_id in mentions:
-        user = await bot.fetch_user(int(user_id))
-        message = message.replace(f"<@{user_id}>", f"@\u200b{user.display_name}")
+    role_names: dict[int, str] = {}
+    if guild:
+        role_names = {role_id: role.name for role_id in role_ids if (role := guild.get_role(role_id))}
 
-    if not guild:
-        return message
+    def replace_mention(match: re.Match[str]) -> str:
+        names = role_names if match.group(1) else user_names
+        name = names.get(int(match.group(2)))
+        return f"@\u200b{name}" if name else match.group(0)
 
-    for role_id in roles:
-        role = guild.get_role(int(role_id))
-        if not role:
-            break
-        message = message.replace(f"<@&{role_id}>", f"@\u200b{role.name}")
-    return message
+    return escape_mentions(MENTION_PATTERN.sub(replace_mention, message))
 
 
 def to_timestamp(time: Any, stamp: Timestamp = Timestamp.Default) -> str:
@@ -91,6 +103,29 @@ def cooler_shorten(text: str, max_width: int) -> str:
     return text[:max_width - place_len] + place
 
 
+class RateLimiter:
+    """A sliding window limiter that holds calls until they fit in the window."""
+
+    def __init__(self, rate: int, period: float) -> None:
+        self.rate = rate
+        self.period = period
+        self.calls: deque[float] = deque()
+
+    async def acquire(self) -> float:
+        """Waits for a free slot in the window and returns the time waited."""
+        now = time.monotonic()
+        while self.calls and now - self.calls[0] >= self.period:
+            self.calls.popleft()
+
+        waited: float = 0.0
+        if len(self.calls) >= self.rate:
+            waited = self.period - (now - self.calls.popleft())
+            await asyncio.sleep(waited)
+
+        self.calls.append(time.monotonic())
+        return waited
+
+
 class EmbScroller(View):
     """A view to scroll through multiple embeds."""
 
@@ -100,9 +135,10 @@ class EmbScroller(View):
         self.embeds = embeds
 
         self.index = 0
+        self.last_index = len(embeds) - 1
         self.update_label()
 
-        if len(embeds) <= 1:
+        if self.last_index <= 0:
             self.forward.disabled = True
 
     async def on_timeout(self) -> None:
@@ -116,20 +152,13 @@ class EmbScroller(View):
 
     def update_label(self) -> None:
         """Updates the jump button label."""
-        self.jump.label = f"{self.index + 1} de {len(self.embeds)}"
+        self.jump.label = f"{self.index + 1} de {self.last_index + 1}"
 
     def set_index(self, new_index: int) -> None:
         """Updates the current index and adjusts buttons."""
         self.index = new_index
-
-        self.back.disabled = False
-        if self.index <= 0:
-            self.back.disabled = True
-
-        self.forward.disabled = False
-        if self.index >= len(self.embeds) - 1:
-            self.forward.disabled = True
-
+        self.back.disabled = new_index <= 0
+        self.forward.disabled = new_index >= self.last_index
         self.update_label()
 
     @button(label="◀", style=ButtonStyle.secondary, disabled=True)